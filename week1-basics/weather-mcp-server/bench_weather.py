@@ -0,0 +1,290 @@
+"""Load-test harness for the weather MCP server.
+
+Runs a local stand-in for the NWS API (a tiny keep-alive HTTP/1.1 server on
+127.0.0.1) with configurable latency, payload size and error rate, points
+`weather.py` at it and drives `get_alerts` / `get_forecast` at fixed
+concurrency levels.
+
+For every level it reports p50/p95/p99 latency, throughput, the number of TCP
+connections the tools opened and the number of upstream requests the fake NWS
+served, so pooling, caching and request-coalescing changes can be compared
+with numbers.
+
+Usage:
+    uv run week1-basics/weather-mcp-server/bench_weather.py --concurrency 1 8 32 --calls 200
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import math
+import random
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import weather
+
+
+@dataclass
+class FakeNWSConfig:
+    """Behaviour of the local NWS stand-in."""
+    latency_ms: float = 50.0
+    jitter_ms: float = 10.0
+    error_rate: float = 0.0
+    alerts: int = 5
+    forecast_periods: int = 14
+    description_bytes: int = 500
+    seed: int = 0
+
+
+@dataclass
+class FakeNWSStats:
+    """Counters collected by the NWS stand-in."""
+    connections: int = 0
+    requests: int = 0
+    errors: int = 0
+    bytes_sent: int = 0
+
+
+class FakeNWS:
+    """Minimal keep-alive HTTP/1.1 server that mimics the NWS endpoints used by weather.py."""
+
+    def __init__(self, config: FakeNWSConfig):
+        self.config = config
+        self.stats = FakeNWSStats()
+        self.base_url = ""
+        self._server: asyncio.Server | None = None
+        self._random = random.Random(config.seed)
+        self._alerts_body = self._build_alerts()
+        self._forecast_body = self._build_forecast()
+
+    def _build_alerts(self) -> bytes:
+        description = "x" * self.config.description_bytes
+        features = [
+            {
+                "properties": {
+                    "event": f"Test Event {i}",
+                    "areaDesc": "Benchmark County",
+                    "severity": "Moderate",
+                    "description": description,
+                    "instruction": "Stay calm and keep benchmarking.",
+                }
+            }
+            for i in range(self.config.alerts)
+        ]
+        return json.dumps({"features": features}).encode()
+
+    def _build_forecast(self) -> bytes:
+        description = "y" * self.config.description_bytes
+        periods = [
+            {
+                "name": f"Period {i}",
+                "temperature": 60 + i,
+                "temperatureUnit": "F",
+                "windSpeed": "10 mph",
+                "windDirection": "NW",
+                "detailedForecast": description,
+            }
+            for i in range(self.config.forecast_periods)
+        ]
+        return json.dumps({"properties": {"periods": periods}}).encode()
+
+    def _route(self, path: str) -> tuple[int, bytes]:
+        """Return the status code and JSON body for a request path."""
+        if self._random.random() < self.config.error_rate:
+            self.stats.errors += 1
+            return 500, b'{"detail": "injected failure"}'
+        if path.startswith("/alerts/active/area/"):
+            return 200, self._alerts_body
+        if path.startswith("/points/"):
+            body = {"properties": {"forecast": f"{self.base_url}/gridpoints/TST/1,1/forecast"}}
+            return 200, json.dumps(body).encode()
+        if path.startswith("/gridpoints/"):
+            return 200, self._forecast_body
+        return 404, b'{"detail": "not found"}'
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive = True
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    if name.strip().lower() == "connection" and value.strip().lower() == "close":
+                        keep_alive = False
+
+                _, target, _ = request_line.decode("latin-1").split(" ", 2)
+                path = urlsplit(target).path
+                self.stats.requests += 1
+
+                delay = self.config.latency_ms + self._random.uniform(-1, 1) * self.config.jitter_ms
+                await asyncio.sleep(max(delay, 0) / 1000)
+
+                status, body = self._route(path)
+                head = (
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/geo+json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                ).encode()
+                writer.write(head + body)
+                await writer.drain()
+                self.stats.bytes_sent += len(head) + len(body)
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def reset_stats(self):
+        self.stats = FakeNWSStats()
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+async def call_tool(kind: str) -> bool:
+    """Invoke one weather tool and return whether it produced a real answer."""
+    if kind == "alerts":
+        result = await weather.get_alerts("CA")
+    else:
+        result = await weather.get_forecast(37.7749, -122.4194)
+    return not result.startswith("Unable")
+
+
+async def run_level(nws: FakeNWS, concurrency: int, calls: int, forecast_ratio: float, seed: int) -> dict:
+    """Drive `calls` tool invocations with `concurrency` workers and collect metrics."""
+    picker = random.Random(seed)
+    kinds = ["forecast" if picker.random() < forecast_ratio else "alerts" for _ in range(calls)]
+    latencies: list[float] = []
+    failures = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, failures
+        while next_index < len(kinds):
+            kind = kinds[next_index]
+            next_index += 1
+            start = time.perf_counter()
+            ok = await call_tool(kind)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not ok:
+                failures += 1
+
+    nws.reset_stats()
+    # weather.py reports upstream failures with print(); keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "calls": calls,
+        "failed_calls": failures,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "throughput_rps": round(calls / elapsed, 2) if elapsed else 0.0,
+        "connections_opened": nws.stats.connections,
+        "upstream_requests": nws.stats.requests,
+        "upstream_errors": nws.stats.errors,
+        "upstream_bytes": nws.stats.bytes_sent,
+    }
+
+
+def print_report(results: list[dict]):
+    columns = [
+        ("concurrency", "conc"), ("calls", "calls"), ("failed_calls", "failed"),
+        ("p50_ms", "p50 ms"), ("p95_ms", "p95 ms"), ("p99_ms", "p99 ms"),
+        ("throughput_rps", "req/s"), ("connections_opened", "conns"),
+        ("upstream_requests", "upstream"),
+    ]
+    widths = [max(len(title), *(len(str(r[key])) for r in results)) for key, title in columns]
+    print("  ".join(title.rjust(w) for (_, title), w in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result[key]).rjust(w) for (key, _), w in zip(columns, widths)))
+
+
+async def main(args: argparse.Namespace):
+    config = FakeNWSConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        alerts=args.alerts,
+        forecast_periods=args.forecast_periods,
+        description_bytes=args.description_bytes,
+        seed=args.seed,
+    )
+    nws = FakeNWS(config)
+    await nws.start()
+
+    # FastMCP turns on INFO logging, which makes httpx log every upstream request
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    # Point the server's tools at the stand-in instead of api.weather.gov
+    original_base = weather.NWS_API_BASE
+    weather.NWS_API_BASE = nws.base_url
+    try:
+        results = []
+        for concurrency in args.concurrency:
+            results.append(await run_level(nws, concurrency, args.calls, args.forecast_ratio, args.seed))
+    finally:
+        weather.NWS_API_BASE = original_base
+        await nws.stop()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            for result in results:
+                f.write(json.dumps({**result, "config": vars(config)}) + "\n")
+        print(f"\nWrote {len(results)} result(s) to {args.json}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark weather.py against a local NWS stand-in")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Concurrency levels to run")
+    parser.add_argument("--calls", type=int, default=200, help="Tool calls per concurrency level")
+    parser.add_argument("--forecast-ratio", type=float, default=0.5, help="Fraction of calls that are get_forecast")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mean upstream latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Uniform +/- jitter on upstream latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream requests that return 500")
+    parser.add_argument("--alerts", type=int, default=5, help="Alert features per alerts response")
+    parser.add_argument("--forecast-periods", type=int, default=14, help="Periods per forecast response")
+    parser.add_argument("--description-bytes", type=int, default=500, help="Size of each description field")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency jitter, errors and call mix")
+    parser.add_argument("--json", help="Write results as JSON lines to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,396 @@
+"""Concurrent bulk prompt runner with adaptive rate limiting.
+
+Reads prompts from a JSONL file, one object per line:
+
+    {"id": "q1", "prompt": "Explain API calls in one sentence"}
+    {"id": "q2", "messages": [...], "system": "...", "max_tokens": 200}
+
+and runs them on an `AsyncAnthropic` client with bounded concurrency. The
+concurrency limit adapts to the API: it grows slowly while requests succeed,
+halves on a 429 (once per retry-after window, however many requests hit it),
+and the runner pauses until the window resets whenever the
+`anthropic-ratelimit-*` headers say the remaining budget cannot cover the
+requests in flight, judged by the average request and token cost so far.
+Failed requests are retried with exponential backoff and jitter.
+
+Results are streamed to the output JSONL as they finish. A line that is not
+valid JSON or has neither `prompt` nor `messages`, like a request that fails
+for good, gets an `{"id": ..., "error": ...}` record and the run carries on.
+The output file is also the checkpoint: on restart, prompts that already have
+a successful result are skipped, so an interrupted run resumes where it stopped.
+
+Usage:
+    uv run week2-api/bulk_runner.py prompts.jsonl results.jsonl --concurrency 16
+    uv run week2-api/bulk_runner.py prompts.jsonl results.jsonl --stand-in   # no network
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+import anthropic
+import httpx
+from dotenv import load_dotenv
+
+# Load the API key from a .env file
+load_dotenv()
+
+MODEL = "claude-sonnet-4-20250514"
+MAX_TOKENS = 1000
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+REMAINING_HEADERS = (
+    "anthropic-ratelimit-requests",
+    "anthropic-ratelimit-tokens",
+    "anthropic-ratelimit-input-tokens",
+    "anthropic-ratelimit-output-tokens",
+)
+# Weight of the newest request in the running average of per-request cost
+COST_SMOOTHING = 0.1
+
+
+def request_costs(usage):
+    """How much one request used of each budget in REMAINING_HEADERS."""
+    return {
+        "anthropic-ratelimit-requests": 1,
+        "anthropic-ratelimit-tokens": usage.input_tokens + usage.output_tokens,
+        "anthropic-ratelimit-input-tokens": usage.input_tokens,
+        "anthropic-ratelimit-output-tokens": usage.output_tokens,
+    }
+
+
+def parse_reset(value):
+    """Convert an RFC 3339 reset timestamp into seconds from now."""
+    try:
+        reset = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    return max((reset - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit plus a pause driven by rate-limit headers."""
+
+    def __init__(self, max_concurrency, min_concurrency=1):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max_concurrency)
+        self.active = 0
+        self.paused_until = 0.0
+        # No further decrease until this time, so one burst of 429s halves the limit once
+        self.decrease_until = 0.0
+        # Running average of what one request costs against each rate-limit budget
+        self.average_cost = {}
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+        await self.wait_if_paused()
+
+    async def release(self):
+        async with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+    async def wait_if_paused(self):
+        delay = self.paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def _set_limit(self, limit):
+        async with self._condition:
+            self.limit = min(max(limit, self.min_concurrency), self.max_concurrency)
+            self._condition.notify_all()
+
+    async def on_success(self, headers, usage):
+        # Additive increase: roughly +1 slot per `limit` successful requests
+        await self._set_limit(self.limit + 1 / self.limit)
+        for prefix, cost in request_costs(usage).items():
+            average = self.average_cost.get(prefix, cost)
+            self.average_cost[prefix] = average + COST_SMOOTHING * (cost - average)
+            remaining = headers.get(f"{prefix}-remaining")
+            # Pause when the budget left cannot cover what the requests in flight will use
+            if remaining is not None and int(remaining) <= self.active * self.average_cost[prefix]:
+                reset = parse_reset(headers.get(f"{prefix}-reset"))
+                if reset:
+                    self.pause(reset)
+
+    async def on_rate_limited(self, retry_after):
+        # Multiplicative decrease, then hold everyone back until the server allows more.
+        # Concurrent requests rejected in the same window count as one decrease.
+        now = time.monotonic()
+        if now >= self.decrease_until:
+            await self._set_limit(self.limit / 2)
+            self.decrease_until = now + retry_after
+        self.pause(retry_after)
+
+
+def build_request(item, args):
+    """Turn one input line into `messages.create` keyword arguments."""
+    if not item.get("messages") and not item.get("prompt"):
+        raise ValueError("needs a 'prompt' or 'messages'")
+    messages = item.get("messages") or [{"role": "user", "content": item["prompt"]}]
+    request = {
+        "model": item.get("model", args.model),
+        "max_tokens": item.get("max_tokens", args.max_tokens),
+        "messages": messages,
+    }
+    if item.get("system"):
+        request["system"] = item["system"]
+    return request
+
+
+def retry_after_seconds(error, attempt, args):
+    """Seconds to wait before retrying: the server's hint if any, else backoff with jitter."""
+    response = getattr(error, "response", None)
+    if response is not None:
+        hint = response.headers.get("retry-after")
+        if hint is not None:
+            try:
+                return float(hint)
+            except ValueError:
+                pass
+    backoff = min(args.backoff_base * 2 ** attempt, args.backoff_max)
+    return backoff * (0.5 + random.random() / 2)
+
+
+async def run_one(client, limiter, item_id, request, args):
+    """Run one prompt with retries and return its result record."""
+    started = time.perf_counter()
+    for attempt in range(args.max_attempts):
+        await limiter.wait_if_paused()
+        try:
+            raw = await client.messages.with_raw_response.create(**request)
+        except (anthropic.APIConnectionError, anthropic.APIStatusError) as error:
+            status = getattr(error, "status_code", None)
+            retryable = status is None or status in RETRYABLE_STATUS
+            if not retryable or attempt + 1 == args.max_attempts:
+                return {"id": item_id, "error": f"{type(error).__name__}: {error}", "attempts": attempt + 1}
+            delay = retry_after_seconds(error, attempt, args)
+            if status == 429:
+                await limiter.on_rate_limited(delay)
+            else:
+                await asyncio.sleep(delay)
+            continue
+
+        message = raw.parse()
+        await limiter.on_success(raw.headers, message.usage)
+        return {
+            "id": item_id,
+            "text": "".join(block.text for block in message.content if block.type == "text"),
+            "stop_reason": message.stop_reason,
+            "usage": {"input_tokens": message.usage.input_tokens, "output_tokens": message.usage.output_tokens},
+            "attempts": attempt + 1,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+
+def completed_ids(output_path):
+    """Ids that already have a successful result in the output file."""
+    done = set()
+    try:
+        with open(output_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short by an interrupted run
+                if "error" not in record:
+                    done.add(record["id"])
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def iter_prompts(input_path):
+    """Yield (id, item, error) for each prompt line; ids default to the line number."""
+    with open(input_path) as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as error:
+                yield line_number, None, f"invalid JSON: {error}"
+                continue
+            if not isinstance(item, dict):
+                yield line_number, None, "expected a JSON object"
+                continue
+            yield item.get("id", line_number), item, None
+
+
+async def run(client, args):
+    done = completed_ids(args.output)
+    limiter = AdaptiveLimiter(args.concurrency)
+    tasks = set()
+    counts = {"ok": 0, "failed": 0, "skipped": 0}
+    started = time.perf_counter()
+
+    with open(args.output, "a") as output:
+        def record(result):
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+            counts["failed" if "error" in result else "ok"] += 1
+            finished = counts["ok"] + counts["failed"]
+            if finished % args.progress_every == 0:
+                rate = finished / (time.perf_counter() - started)
+                print(f"{finished} done ({counts['failed']} failed), {rate:.1f}/s, "
+                      f"concurrency limit {limiter.limit:.1f}", file=sys.stderr)
+
+        async def worker(item_id, request):
+            try:
+                result = await run_one(client, limiter, item_id, request, args)
+            except Exception as error:
+                # One broken request must not take the rest of the run down with it
+                result = {"id": item_id, "error": f"{type(error).__name__}: {error}"}
+            finally:
+                await limiter.release()
+            record(result)
+
+        try:
+            for item_id, item, error in iter_prompts(args.input):
+                if item_id in done:
+                    counts["skipped"] += 1
+                    continue
+                if error is None:
+                    try:
+                        request = build_request(item, args)
+                    except ValueError as invalid:
+                        error = str(invalid)
+                if error is not None:
+                    record({"id": item_id, "error": f"Invalid prompt: {error}", "attempts": 0})
+                    continue
+                # Acquire before creating the task so at most `limit` prompts are in memory
+                await limiter.acquire()
+                task = asyncio.create_task(worker(item_id, request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            # Let the prompts already in flight finish before the output file is closed
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    elapsed = time.perf_counter() - started
+    print(f"Finished: {counts['ok']} ok, {counts['failed']} failed, {counts['skipped']} skipped "
+          f"in {elapsed:.1f}s", file=sys.stderr)
+    return counts
+
+
+class StandInServer:
+    """In-process stand-in for the Messages API with per-second request and token limits.
+
+    Served through `httpx.MockTransport`, so the runner's retry, backoff and
+    rate-limit handling can be exercised end to end without network access.
+    """
+
+    def __init__(self, requests_per_second=20, tokens_per_second=150, latency_ms=50.0, error_rate=0.02, seed=0):
+        self.requests_per_second = requests_per_second
+        self.tokens_per_second = tokens_per_second
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.window_start = time.time()
+        self.window_count = 0
+        self.window_tokens = 0
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0}
+
+    def _rate_headers(self):
+        reset = datetime.fromtimestamp(self.window_start + 1, timezone.utc)
+        return {
+            "anthropic-ratelimit-requests-limit": str(self.requests_per_second),
+            "anthropic-ratelimit-requests-remaining": str(max(self.requests_per_second - self.window_count, 0)),
+            "anthropic-ratelimit-requests-reset": reset.isoformat().replace("+00:00", "Z"),
+            "anthropic-ratelimit-tokens-limit": str(self.tokens_per_second),
+            "anthropic-ratelimit-tokens-remaining": str(max(self.tokens_per_second - self.window_tokens, 0)),
+            "anthropic-ratelimit-tokens-reset": reset.isoformat().replace("+00:00", "Z"),
+        }
+
+    async def handle(self, request):
+        self.stats["requests"] += 1
+        now = time.time()
+        if now - self.window_start >= 1:
+            self.window_start, self.window_count, self.window_tokens = now, 0, 0
+        if self.window_count >= self.requests_per_second or self.window_tokens >= self.tokens_per_second:
+            self.stats["rate_limited"] += 1
+            retry_after = max(self.window_start + 1 - now, 0.01)
+            return httpx.Response(
+                429,
+                headers={**self._rate_headers(), "retry-after": f"{retry_after:.3f}"},
+                json={"type": "error", "error": {"type": "rate_limit_error", "message": "Rate limited"}},
+            )
+        self.window_count += 1
+
+        await asyncio.sleep(self.latency_ms / 1000 * (0.5 + self.random.random()))
+        if self.random.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return httpx.Response(529, json={"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}})
+
+        body = json.loads(request.content)
+        prompt = body["messages"][-1]["content"]
+        text = f"Stand-in reply to: {prompt if isinstance(prompt, str) else '[blocks]'}"
+        usage = {"input_tokens": len(str(prompt)) // 4 + 1, "output_tokens": len(text) // 4 + 1}
+        self.window_tokens += usage["input_tokens"] + usage["output_tokens"]
+        return httpx.Response(200, headers=self._rate_headers(), json={
+            "id": f"msg_standin_{self.stats['requests']}",
+            "type": "message",
+            "role": "assistant",
+            "model": body["model"],
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": usage,
+        })
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run a JSONL file of prompts against the Messages API")
+    parser.add_argument("input", help="Input JSONL with one prompt per line")
+    parser.add_argument("output", help="Output JSONL; also the checkpoint for resuming")
+    parser.add_argument("--model", default=MODEL)
+    parser.add_argument("--max-tokens", type=int, default=MAX_TOKENS)
+    parser.add_argument("--concurrency", type=int, default=16, help="Upper bound on in-flight requests")
+    parser.add_argument("--max-attempts", type=int, default=6, help="Attempts per prompt before giving up")
+    parser.add_argument("--backoff-base", type=float, default=1.0, help="First retry delay in seconds")
+    parser.add_argument("--backoff-max", type=float, default=60.0, help="Longest retry delay in seconds")
+    parser.add_argument("--progress-every", type=int, default=100, help="Print progress every N results")
+    parser.add_argument("--base-url", help="Send requests to this URL instead of the Anthropic API")
+    parser.add_argument("--stand-in", action="store_true", help="Use the in-process stand-in server")
+    return parser.parse_args()
+
+
+async def main(args):
+    # The runner owns retries, so the SDK's own retry loop is switched off
+    if args.stand_in:
+        server = StandInServer()
+        client = anthropic.AsyncAnthropic(
+            api_key="stand-in",
+            max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(server.handle)),
+        )
+    else:
+        server = None
+        client = anthropic.AsyncAnthropic(
+            max_retries=0,
+            base_url=args.base_url,
+            http_client=anthropic.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            ),
+        )
+
+    async with client:
+        await run(client, args)
+    if server is not None:
+        print(f"Stand-in server: {server.stats}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -1,12 +1,22 @@
 import anthropic
 from dotenv import load_dotenv
 import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# Shared week2-api helpers live one directory up
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from response_cache import maybe_cached
+from telemetry import instrument
 
 # load environment variables from .env file
 load_dotenv()
 
 # Create a client instance
-client = anthropic.Anthropic()
+client = maybe_cached(instrument(anthropic.Anthropic(), strategy="calculator_tool"))
 
 # Define the calculator tool
 tools = [
@@ -32,9 +42,41 @@ tools = [
             },
             "required": ["operation", "num1", "num2"]
         }
+    },
+    {
+        "name": "batch_calculator",
+        "description": (
+            "Apply one operation element-wise over two arrays of numbers in a single call. "
+            "Use this instead of many calculator calls when the same operation is needed on "
+            "several pairs of numbers. A one-element array is applied to every element of the other."
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "operation": {
+                    "type": "string",
+                    "enum": ["add", "subtract", "multiply", "divide"],
+                    "description": "The mathematical operation to perform"
+                },
+                "operands1": {
+                    "type": "array",
+                    "items": {"type": "number"},
+                    "description": "The first numbers"
+                },
+                "operands2": {
+                    "type": "array",
+                    "items": {"type": "number"},
+                    "description": "The second numbers"
+                }
+            },
+            "required": ["operation", "operands1", "operands2"]
+        }
     }
 ]
 
+# Maximum number of model calls the agent loop makes for one user request
+MAX_AGENT_STEPS = 8
+
 # Function to perform the calculation based on the tool input
 def calculator(operation, num1, num2):
     """
@@ -59,68 +101,112 @@ def calculator(operation, num1, num2):
         return "Error: Invalid operation."
 
 
-# Chat method to interact with Claude and use the calculator tool
+# Vectorized variant of the calculator for many pairs of numbers at once
+def batch_calculator(operation, operands1, operands2):
+    """
+    Apply one arithmetic operation element-wise over two arrays of numbers.
+    :param operation: The mathematical operation to perform ("add", "subtract", "multiply", "divide")
+    :param operands1: The first numbers
+    :param operands2: The second numbers (a single number is broadcast)
+    :return: The list of results (None where a division by zero was requested) or an error message
+    """
+    a = np.asarray(operands1, dtype=float)
+    b = np.asarray(operands2, dtype=float)
+    if a.shape != b.shape and 1 not in (a.size, b.size):
+        return "Error: operands1 and operands2 must have the same length."
+
+    if operation == "add":
+        results = np.add(a, b)
+    elif operation == "subtract":
+        results = np.subtract(a, b)
+    elif operation == "multiply":
+        results = np.multiply(a, b)
+    elif operation == "divide":
+        a, b = np.broadcast_arrays(a, b)
+        results = np.divide(a, b, out=np.full(a.shape, np.nan), where=b != 0)
+    else:
+        return "Error: Invalid operation."
+
+    return [None if np.isnan(value) else value.item() for value in results]
+
+
+# Tool name -> function, used by the agent loop to dispatch tool_use blocks
+tool_functions = {
+    "calculator": calculator,
+    "batch_calculator": batch_calculator,
+}
+
+
+def run_tool(tool_use_block):
+    """Execute one tool_use block and return its tool_result content block."""
+    function = tool_functions.get(tool_use_block.name)
+    if function is None:
+        result, is_error = f"Error: Unknown tool {tool_use_block.name}", True
+    else:
+        try:
+            result = function(**tool_use_block.input)
+            is_error = isinstance(result, str) and result.startswith("Error")
+        except Exception as e:
+            result, is_error = f"Error: {e}", True
+
+    return {
+        "type": "tool_result",
+        "tool_use_id": tool_use_block.id,
+        "content": json.dumps(result) if isinstance(result, list) else str(result),
+        "is_error": is_error,
+    }
+
+
+# Agent loop: run every requested tool concurrently and keep going until Claude is done
+def run_agent_loop(messages, max_steps=MAX_AGENT_STEPS):
+    """Call Claude with the tools until it stops asking for them; return the final response and total usage."""
+    usage = anthropic.types.Usage(input_tokens=0, output_tokens=0)
+
+    with ThreadPoolExecutor() as executor:
+        for step in range(1, max_steps + 1):
+            response = client.messages.create(
+                model="claude-sonnet-4-20250514",
+                max_tokens=1000,
+                tools=tools,  # ← Pass the tools!
+                messages=messages
+            )
+            usage.input_tokens += response.usage.input_tokens
+            usage.output_tokens += response.usage.output_tokens
+
+            print(f"\n=== STEP {step} ===")
+            print(f"Stop reason: {response.stop_reason}")
+
+            if response.stop_reason != "tool_use":
+                return response, usage
+
+            # Claude may ask for several tools in one response; run them all at once
+            tool_use_blocks = [block for block in response.content if block.type == "tool_use"]
+            for block in tool_use_blocks:
+                print(f"Tool: {block.name} Input: {block.input}")
+            tool_results = list(executor.map(run_tool, tool_use_blocks))
+            for tool_result in tool_results:
+                print(f"Result: {tool_result['content']}")
+
+            # Send every result back in a single user message
+            messages.append({"role": "assistant", "content": response.content})
+            messages.append({"role": "user", "content": tool_results})
+
+    print(f"\nStopped after {max_steps} steps without a final answer.")
+    return response, usage
+
+
+# Chat method to interact with Claude and use the calculator tools
 def chat_with_claude_and_calculator(user_input):
-    """Chat with Claude and use the calculator tool when needed."""
-    # Create the message for Claude, including the tool definition
+    """Chat with Claude and use the calculator tools as many times as needed."""
     messages = [
         {"role": "user", "content": user_input}
     ]
 
-    # Generate response from Claude
-    response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=1000,
-            tools=tools,  # ← Pass the tools!
-            messages=messages
-        )
-
-    print("=== INITIAL RESPONSE ===")
-    print(f"Stop reason: {response.stop_reason}")
-    print(f"Content: {response.content}")
-
-    # Check if Claude wants to use a tool
-    if response.stop_reason == "tool_use":
-        # Extract tool use request
-        tool_use_block = next(block for block in response.content if block.type == "tool_use")
-
-        print(f"\n=== CLAUDE WANTS TO USE TOOL ===")
-        print(f"Tool: {tool_use_block.name}")
-        print(f"Input: {tool_use_block.input}")
-
-        # Execute the tool
-        tool_result = calculator(**tool_use_block.input)
-
-        print(f"\n=== TOOL RESULT ===")
-        print(f"Result: {tool_result}")
-
-        # Send result back to Claude
-        final_response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=1000,
-            tools=tools,
-            messages=[
-                {"role": "user", "content": user_input},  # Original user input for context
-                {"role": "assistant", "content": response.content},  # Claude's tool request
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": tool_use_block.id,
-                            "content": str(tool_result)
-                        }
-                    ]
-                }
-            ]
-        )
+    final_response, usage = run_agent_loop(messages)
 
-        print(f"\n=== FINAL ANSWER ===")
-        print(final_response.content[0].text)
-        return final_response.usage
-    else:
-        print("\nClaude did not request to use the tool.")
-        return response.usage
+    print(f"\n=== FINAL ANSWER ===")
+    print("".join(block.text for block in final_response.content if block.type == "text"))
+    return usage
 
 # Example usage
 if __name__ == "__main__":
@@ -1,43 +1,44 @@
-import anthropic
-from dotenv import load_dotenv
-
-# Load the API key from a .env file
-load_dotenv()
-
-# Create a client instance
-client = anthropic.Anthropic()
-
-# Print welcome message
-print("Welcome to Claude CLI Chat (type 'quit' to exit)\n")
-
-# Conversation history memory
-conversation = []
-
-# Start a simple chat loop
-while True:
-    user_input = input("\nYou: ")
-    if user_input.lower() in ["exit", "quit"]:
-        print("Exiting the chat. Goodbye!")
-        break
-
-    # Add user input to conversation history
-    conversation.append({"role": "user", "content": user_input})
-
-    # Generate response from Claude using streaming
-    with client.messages.stream(
-        model="claude-sonnet-4-20250514",
-        max_tokens=1000,
-        messages=conversation
-    ) as stream_response:
-        for chunk in stream_response.text_stream:
-            print(chunk, end="", flush=True)
-    
-    # Get the final message to access token usage
-    final_message = stream_response.get_final_message()
-
-    # Add Claude's (assistant) response to conversation history
-    assistant_response = final_message.content[0].text
-    conversation.append({"role": "assistant", "content": assistant_response})
-
-    print(f"\nInput tokens Used: {final_message.usage.input_tokens}")
-    print(f"Output tokens Used: {final_message.usage.output_tokens}")
+import asyncio
+import sys
+
+from chat_engine import ChatEngine
+from conversation_store import ConversationStore
+from prompt_cache import format_cache_usage
+
+
+# Keep this many tokens of history in memory; older turns stay on disk only
+MAX_HISTORY_TOKENS = 8000
+
+
+async def main(session_id):
+    # One engine can hold many sessions; this CLI drives a single one.
+    # History is persisted, so running with the same session name resumes it.
+    store = ConversationStore()
+    async with ChatEngine(store=store, max_history_tokens=MAX_HISTORY_TOKENS) as engine:
+        session = engine.session(session_id)
+
+        # Print welcome message
+        print("Welcome to Claude CLI Chat (type 'quit' to exit)\n")
+        if session.messages:
+            print(f"Resumed session '{session_id}' with {len(session.messages)} message(s) in context.")
+
+        # Start a simple chat loop
+        while True:
+            user_input = await asyncio.to_thread(input, "\nYou: ")
+            if user_input.lower() in ["exit", "quit"]:
+                print("Exiting the chat. Goodbye!")
+                break
+
+            # Generate response from Claude using streaming
+            async for chunk in session.stream(user_input):
+                print(chunk, end="", flush=True)
+
+            # The final message gives access to token usage
+            final_message = session.last_message
+            print(f"\nInput tokens Used: {final_message.usage.input_tokens}")
+            print(f"Output tokens Used: {final_message.usage.output_tokens}")
+            print(format_cache_usage(final_message.usage))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "cli"))
@@ -0,0 +1,163 @@
+"""Fast-start CLI front-end for the warm chat daemon.
+
+Imports only the standard library pieces it needs and talks to
+`chat_daemon.py` over a Unix socket, so launching a chat takes milliseconds:
+the daemon already holds the Anthropic client, its warm connection pool and
+the conversation state. If no daemon is running, one is started in the
+background on first use.
+
+The socket lives in `$XDG_RUNTIME_DIR`, or else in a private 0700 directory
+under the temp dir, and the client refuses to talk to a socket (or directory)
+owned by another user.
+
+Usage:
+    uv run week2-api/chat_client.py [session-name]
+    uv run week2-api/chat_client.py --stop
+"""
+
+import json
+import os
+import socket
+import stat
+import sys
+import time
+
+
+def default_socket_path():
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if not runtime_dir:
+        # Not the shared temp dir itself: a per-user directory only we can enter
+        runtime_dir = os.path.join(os.getenv("TMPDIR", "/tmp"), f"claude-learn-chat-{os.getuid()}")
+    return os.path.join(runtime_dir, "claude-learn-chat.sock")
+
+
+SOCKET_PATH = os.getenv("CHAT_DAEMON_SOCKET") or default_socket_path()
+DAEMON_LOG_PATH = SOCKET_PATH + ".log"
+DAEMON_START_TIMEOUT = 10.0
+
+
+def ensure_socket_dir(socket_path=SOCKET_PATH):
+    """Create the socket's directory (0700) and check no other user can swap files in it."""
+    directory = os.path.dirname(socket_path) or "."
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o022:
+        sys.exit(f"Refusing to use {directory}: it must be a directory owned by you and not writable by others")
+
+
+def connect():
+    """Connect to the daemon's socket; raises OSError if no daemon is listening."""
+    info = os.lstat(SOCKET_PATH)
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        sys.exit(f"Refusing to connect: {SOCKET_PATH} is not a socket owned by you")
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(SOCKET_PATH)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def start_daemon():
+    """Launch the daemon in the background and wait until it accepts connections."""
+    import fcntl
+    import subprocess
+
+    with open(SOCKET_PATH + ".start.lock", "a") as lock:
+        # Clients starting at the same moment launch one daemon between them
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            return connect()
+        except OSError:
+            pass
+
+        daemon = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chat_daemon.py")
+        with open(DAEMON_LOG_PATH, "ab") as log:
+            process = subprocess.Popen(
+                [sys.executable, daemon],
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=log,
+                start_new_session=True,
+            )
+        deadline = time.monotonic() + DAEMON_START_TIMEOUT
+        while time.monotonic() < deadline:
+            try:
+                return connect()
+            except OSError:
+                if process.poll() is not None:
+                    with open(DAEMON_LOG_PATH) as log:
+                        reason = (log.read().strip().splitlines() or ["no output"])[-1]
+                    sys.exit(f"Chat daemon exited during start-up: {reason}\nSee {DAEMON_LOG_PATH}")
+                time.sleep(0.05)
+    sys.exit(f"Chat daemon did not start within {DAEMON_START_TIMEOUT:.0f}s; see {DAEMON_LOG_PATH}")
+
+
+def send(sock, request):
+    sock.sendall(json.dumps(request).encode() + b"\n")
+
+
+def main():
+    args = sys.argv[1:]
+    ensure_socket_dir()
+    if args == ["--stop"]:
+        try:
+            sock = connect()
+        except OSError:
+            print("Chat daemon is not running.")
+            return
+        send(sock, {"type": "shutdown"})
+        print("Chat daemon stopped.")
+        return
+
+    session_id = args[0] if args else "cli"
+    try:
+        sock = connect()
+    except OSError:
+        sock = start_daemon()
+    replies = sock.makefile("rb")
+
+    send(sock, {"type": "hello", "session": session_id})
+    hello = json.loads(replies.readline())
+    print("Welcome to Claude CLI Chat (type 'quit' to exit)\n")
+    if hello.get("messages"):
+        print(f"Resumed session '{session_id}' with {hello['messages']} message(s) in context.")
+
+    while True:
+        try:
+            user_input = input("\nYou: ")
+        except EOFError:
+            break
+        if user_input.lower() in ["exit", "quit"]:
+            print("Exiting the chat. Goodbye!")
+            break
+
+        send(sock, {"type": "chat", "session": session_id, "message": user_input})
+        # The daemon streams one JSON object per line: text chunks, then a final status
+        for line in replies:
+            event = json.loads(line)
+            if "text" in event:
+                sys.stdout.write(event["text"])
+                sys.stdout.flush()
+            elif "error" in event:
+                print(f"\nError: {event['error']}")
+                break
+            else:
+                usage = event["usage"]
+                print(f"\nInput tokens Used: {usage['input_tokens']}")
+                print(f"Output tokens Used: {usage['output_tokens']}")
+                print(f"Cache read tokens: {usage['cache_read_input_tokens']}")
+                print(f"Cache write tokens: {usage['cache_creation_input_tokens']}")
+                break
+        else:
+            sys.exit("\nLost connection to the chat daemon.")
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,89 +1,100 @@
 import anthropic
 from dotenv import load_dotenv
 
+from context_window import TokenBudgetWindow, estimate_tokens
+from conversation_store import ConversationStore
+from fact_store import FactStore
+from prompt_cache import cached_request, format_cache_usage
+from rolling_summary import RollingSummarizer
+from telemetry import instrument
+
 # Load the API key from a .env file
 load_dotenv()
 
 # Create a client instance
 client = anthropic.Anthropic()
 
-# Conversation history memory
-conversation = []
+# Per-strategy views of the client, so telemetry can compare the strategies
+sliding_window_client = instrument(client, strategy="sliding_window")
+summarization_client = instrument(client, strategy="summarization")
+semantic_compression_client = instrument(client, strategy="semantic_compression")
+
+# For the token-budget window, history is trimmed to fit this many input tokens
+MAX_CONTEXT_TOKENS = 4000  # Adjust this value based on your needs
+SYSTEM_PROMPT = "You are a helpful assistant."
+
+# Token-budget window: the system prompt is pinned, old turns are evicted by size
+window = TokenBudgetWindow(MAX_CONTEXT_TOKENS, system=SYSTEM_PROMPT)
+
+# Summarization: turns evicted from this window are folded into a rolling summary
+summary_window = TokenBudgetWindow(MAX_CONTEXT_TOKENS, system=SYSTEM_PROMPT)
+summarizer = RollingSummarizer(instrument(client, strategy="summarization_fold"))
 
-# For Sliding Window Strategy, we will keep only the last N messages in the conversation history
-MAX_HISTORY_LENGTH = 3  # Adjust this value based on your needs
+# Semantic compression: only recent turns are sent, older ones become searchable facts
+RECENT_CONTEXT_TOKENS = 1000  # Adjust this value based on your needs
+TOP_K_FACTS = 5
+compression_window = TokenBudgetWindow(RECENT_CONTEXT_TOKENS, system=SYSTEM_PROMPT)
+fact_store = FactStore()
 
 # Chat Method with Sliding Window Strategy for conversation history
 def chat_with_claude_sliding_window(user_input):
-    """Chat with Claude using the conversation history for context."""
-    # Add user input to conversation history
-    conversation.append({"role": "user", "content": user_input})
-    
-    # Implementing the sliding window strategy to keep only the last N messages in the conversation history
-    if len(conversation) > MAX_HISTORY_LENGTH:
-        # if first message is system, we want to keep it, otherwise we can pop it
-        if conversation[0]["role"] == "system":
-            conversation[:] = conversation[0:1] + conversation[-(MAX_HISTORY_LENGTH-1):]  # Keep the system message and remove the second oldest message
-        else:
-            conversation[:] = conversation[-MAX_HISTORY_LENGTH:]  # Keep only the last N messages
-
-    # Generate response from Claude
-    with client.messages.stream(
+    """Chat with Claude using a token-budget sliding window of the conversation history."""
+    # Add user input to the window; the oldest turns are evicted once it is over budget
+    window.add({"role": "user", "content": user_input})
+
+    # Generate response from Claude, caching the stable prefix of the window
+    with sliding_window_client.messages.stream(**cached_request(
+        window.messages,
+        system=window.system,
         model="claude-sonnet-4-20250514",
         max_tokens=1000,
-        messages=conversation
-    ) as stream_response:
+    )) as stream_response:
         for chunk in stream_response.text_stream:
             print(chunk, end="", flush=True)
     
     # Get the final message to access token usage
     final_message = stream_response.get_final_message()
 
-    # Add Claude's (assistant) response to conversation history
+    # Swap the estimate for the user turn with the API's count, then add the reply
+    window.record_usage(final_message.usage)
     assistant_response = final_message.content[0].text
-    conversation.append({"role": "assistant", "content": assistant_response})
+    window.add({"role": "assistant", "content": assistant_response}, tokens=final_message.usage.output_tokens)
 
     return assistant_response, final_message.usage
 
 
 # Chat method for summarizaton to keep the conversation history concise
 def chat_with_claude_summarization(user_input):
-    """Chat with Claude using summarization to keep the conversation history concise."""
-    # Add user input to conversation history
-    conversation.append({"role": "user", "content": user_input})
-
-    if len(conversation) > MAX_HISTORY_LENGTH:
-        # Ask Claude to summarize conversation so far
-        summary = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=500,
-            messages=[{
-                "role": "user",
-                "content": f"Summarize this conversation in 3-4 sentences:\n{conversation}"
-            }]
-        )
-        # Replace old messages with summary
-        conversation = [
-            {"role": "assistant", "content": f"Previous context: {summary}"},
-            *conversation[-MAX_HISTORY_LENGTH:]  # Keep recent N messages
-        ]    
-    
+    """Chat with Claude using a rolling summary of the turns that left the context window."""
+    # Add user input to the window; anything evicted is folded into the summary later
+    evicted = summary_window.add({"role": "user", "content": user_input})
+
+    # The latest finished summary rides along in the system prompt
+    summary_note = ""
+    if summarizer.summary:
+        summary_note = f"\n\nSummary of the earlier conversation:\n{summarizer.summary}"
+    system = SYSTEM_PROMPT + summary_note
+
     # Generate response from Claude with summarization
-    with client.messages.stream(
+    with summarization_client.messages.stream(**cached_request(
+        summary_window.messages,
+        system=system,
         model="claude-sonnet-4-20250514",
         max_tokens=1000,
-        messages=conversation,
-        summary=True  # Enable summarization
-    ) as stream_response:
+    )) as stream_response:
         for chunk in stream_response.text_stream:
             print(chunk, end="", flush=True)
     
     # Get the final message to access token usage
     final_message = stream_response.get_final_message()
 
-    # Add Claude's (assistant) response to conversation history
+    # Add Claude's (assistant) response to the window; the summary is not part of the window
+    summary_window.record_usage(final_message.usage, extra_tokens=estimate_tokens(summary_note))
     assistant_response = final_message.content[0].text
-    conversation.append({"role": "assistant", "content": assistant_response})
+    evicted += summary_window.add({"role": "assistant", "content": assistant_response}, tokens=final_message.usage.output_tokens)
+
+    # Summarize the evicted turns in the background; the reply has already streamed
+    summarizer.fold(evicted)
 
     return assistant_response, final_message.usage
 
@@ -91,43 +102,57 @@ def chat_with_claude_summarization(user_input):
 # Chat methhod for Semantic Compression (Advanced) Store important facts separately, inject only relevant ones:
 def chat_with_claude_semantic_compression(user_input):
     """Chat with Claude using semantic compression to keep the conversation history concise."""
-    # Add user input to conversation history
-    conversation.append({"role": "user", "content": user_input})
-
-    # Extract important facts from the conversation so far
-    important_facts = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=500,
-        messages=[{
-            "role": "user",
-            "content": f"Extract important facts from this conversation:\n{conversation}"
-        }]
-    )
-
-    # Store important facts separately (for demonstration, we just print them here)
-    print(f"\nImportant Facts: {important_facts}")
-
-    # Generate response from Claude with semantic compression
-    with client.messages.stream(
+    # Add user input to the recent window; evicted turns are indexed as facts
+    evicted = compression_window.add({"role": "user", "content": user_input})
+    for message in evicted:
+        fact_store.add_message(message)
+
+    # Retrieve only the facts relevant to this turn from the local store (no API call)
+    relevant_facts = fact_store.search(user_input, k=TOP_K_FACTS)
+    facts_note = ""
+    if relevant_facts:
+        facts_note = "Relevant facts from earlier in the conversation:\n" + "\n".join(f"- {fact}" for fact, _ in relevant_facts)
+
+    # Generate response from Claude with semantic compression; the facts change every
+    # turn, so they go after the cache breakpoint instead of into the system prompt
+    with semantic_compression_client.messages.stream(**cached_request(
+        compression_window.messages,
+        system=compression_window.system,
+        turn_context=facts_note,
         model="claude-sonnet-4-20250514",
         max_tokens=1000,
-        messages=conversation,
-    ) as stream_response:
+    )) as stream_response:
         for chunk in stream_response.text_stream:
             print(chunk, end="", flush=True)
 
     # Get the final message to access token usage
     final_message = stream_response.get_final_message()
 
-    # Add Claude's (assistant) response to conversation history
+    # Add Claude's (assistant) response to the recent window; the facts are not part of the window
+    compression_window.record_usage(final_message.usage, extra_tokens=estimate_tokens(facts_note))
     assistant_response = final_message.content[0].text
-    conversation.append({"role": "assistant", "content": assistant_response})
+    for message in compression_window.add({"role": "assistant", "content": assistant_response}, tokens=final_message.usage.output_tokens):
+        fact_store.add_message(message)
 
     return assistant_response, final_message.usage
 
 
 # Multi-turn conversation
 if __name__ == "__main__":
+    # Persist the conversation and resume only the window the active strategy needs;
+    # history older than the window is rebuilt into the strategy's own memory
+    store = ConversationStore()
+    session_id = "context-length-strategy"
+
+    #window.attach(store, session_id)
+
+    #window_start = summary_window.attach(store, session_id)
+    #summarizer.fold(list(store.iter_before(session_id, window_start)))
+
+    window_start = compression_window.attach(store, session_id)
+    for message in store.iter_before(session_id, window_start):
+        fact_store.add_message(message)
+
     while True:
         user_input = input("\nYou: ")
         if user_input.lower() in ["exit", "quit"]:
@@ -139,3 +164,4 @@ if __name__ == "__main__":
         claude_response, usage = chat_with_claude_semantic_compression(user_input)
         print(f"\nClaude: {claude_response}")
         print(f"\nInput tokens: {usage.input_tokens}\nOutput tokens: {usage.output_tokens}")
+        print(format_cache_usage(usage))
@@ -0,0 +1,208 @@
+"""Long-running chat daemon that keeps everything warm between chats.
+
+Interpreter start-up, importing `anthropic`/`httpx`/`dotenv`, building the
+client and the first TLS handshake are paid once, when the daemon starts.
+After that it holds a `ChatEngine` (shared async client and connection pool),
+the conversation store and every open session, and serves `chat_client.py`
+over a Unix socket.
+
+Protocol: newline-delimited JSON in both directions.
+
+    -> {"type": "hello", "session": "cli"}
+    <- {"messages": 4}
+    -> {"type": "chat", "session": "cli", "message": "Hi"}
+    <- {"text": "Hel"}  {"text": "lo!"}  ...  {"done": true, "usage": {...}}
+    -> {"type": "shutdown"}
+
+The daemon shuts itself down once no client has been connected or active for
+`IDLE_TIMEOUT` seconds, so one started on demand does not linger.
+
+Usage:
+    uv run week2-api/chat_daemon.py     (chat_client.py starts it on demand)
+"""
+
+import asyncio
+import contextlib
+import fcntl
+import json
+import os
+import signal
+import socket
+import sys
+
+import anthropic
+import httpx
+
+from chat_client import SOCKET_PATH, ensure_socket_dir
+from chat_engine import ChatEngine
+from conversation_store import ConversationStore
+from telemetry import instrument
+
+# Keep this many tokens of history in memory per session; older turns stay on disk only
+MAX_HISTORY_TOKENS = 8000
+MAX_IN_FLIGHT = 8
+# Ping the API this often while idle so the pooled TLS connection stays open
+KEEPALIVE_INTERVAL = 60.0
+# Exit after this long without any client activity
+IDLE_TIMEOUT = 30 * 60.0
+
+
+def socket_in_use(path):
+    """Whether a daemon answers on the socket; False if it is missing or left over from a crash."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+class ChatDaemon:
+    """Serves chat sessions from one warm ChatEngine over a Unix socket."""
+
+    def __init__(self, socket_path=SOCKET_PATH):
+        self.socket_path = socket_path
+        api = anthropic.AsyncAnthropic(
+            http_client=anthropic.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=MAX_IN_FLIGHT,
+                    max_keepalive_connections=MAX_IN_FLIGHT,
+                    keepalive_expiry=KEEPALIVE_INTERVAL * 2,
+                )
+            )
+        )
+        # Without credentials every request fails, so there is nothing to keep warm
+        if api.api_key is None and api.auth_token is None:
+            sys.exit("Chat daemon needs ANTHROPIC_API_KEY (set it in the environment or a .env file)")
+        self.engine = ChatEngine(
+            client=instrument(api, strategy="chat_daemon"),
+            max_in_flight=MAX_IN_FLIGHT,
+            store=ConversationStore(),
+            max_history_tokens=MAX_HISTORY_TOKENS,
+        )
+        self._stopped = asyncio.Event()
+        self._last_activity = 0.0
+        self._clients = 0
+
+    async def warm_up(self):
+        """Open a pooled connection (DNS + TLS) before the first chat needs it."""
+        try:
+            await self.engine.client.models.list(limit=1)
+        except Exception as e:
+            # A failed ping must not end the keep-alive loop that also runs the idle shutdown
+            print(f"Warm-up request failed: {e}", flush=True)
+
+    async def keep_alive(self):
+        """Keep the pooled connection warm while in use; stop the daemon once idle."""
+        loop = asyncio.get_running_loop()
+        await self.warm_up()
+        while not self._stopped.is_set():
+            await asyncio.sleep(KEEPALIVE_INTERVAL)
+            idle = loop.time() - self._last_activity
+            if idle >= IDLE_TIMEOUT:
+                # A connected client may still be typing; only exit once it has gone
+                if not self._clients:
+                    print(f"No activity for {IDLE_TIMEOUT:.0f}s, shutting down", flush=True)
+                    self._stopped.set()
+            elif idle >= KEEPALIVE_INTERVAL:
+                await self.warm_up()
+
+    async def send(self, writer, event):
+        writer.write(json.dumps(event).encode() + b"\n")
+        await writer.drain()
+
+    async def chat(self, writer, session_id, message):
+        session = self.engine.session(session_id)
+        try:
+            async for chunk in session.stream(message):
+                await self.send(writer, {"text": chunk})
+        except ConnectionError:
+            raise
+        except Exception as e:
+            # Report any failure to the client rather than dropping its connection
+            await self.send(writer, {"error": str(e) or type(e).__name__})
+            return
+        usage = session.last_message.usage
+        await self.send(writer, {"done": True, "usage": {
+            "input_tokens": usage.input_tokens,
+            "output_tokens": usage.output_tokens,
+            "cache_read_input_tokens": usage.cache_read_input_tokens or 0,
+            "cache_creation_input_tokens": usage.cache_creation_input_tokens or 0,
+        }})
+
+    async def handle_client(self, reader, writer):
+        self._clients += 1
+        try:
+            while line := await reader.readline():
+                self._last_activity = asyncio.get_running_loop().time()
+                request = json.loads(line)
+                if request["type"] == "hello":
+                    session = self.engine.session(request["session"])
+                    await self.send(writer, {"messages": len(session.messages)})
+                elif request["type"] == "chat":
+                    await self.chat(writer, request["session"], request["message"])
+                elif request["type"] == "shutdown":
+                    self._stopped.set()
+                    break
+        except (ConnectionError, json.JSONDecodeError, KeyError):
+            pass
+        finally:
+            self._clients -= 1
+            self._last_activity = asyncio.get_running_loop().time()
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def close(self):
+        await self.engine.close()
+        self.engine.store.close()
+
+    async def serve(self):
+        ensure_socket_dir(self.socket_path)
+        # One daemon per socket: the lock is held until this process exits
+        self._lock_file = open(self.socket_path + ".lock", "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            print(f"Another chat daemon already holds {self.socket_path}", flush=True)
+            await self.close()
+            return
+        if socket_in_use(self.socket_path):
+            print(f"A chat daemon is already listening on {self.socket_path}", flush=True)
+            await self.close()
+            return
+        # A socket file left by a crashed daemon would make bind() fail
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+        # Create the socket as 0600 from the start rather than chmod-ing it after bind
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self.handle_client, path=self.socket_path)
+        finally:
+            os.umask(umask)
+        bound = os.stat(self.socket_path)
+
+        loop = asyncio.get_running_loop()
+        self._last_activity = loop.time()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self._stopped.set)
+
+        keep_alive = asyncio.create_task(self.keep_alive())
+        print(f"Chat daemon listening on {self.socket_path}", flush=True)
+        try:
+            async with server:
+                await self._stopped.wait()
+        finally:
+            keep_alive.cancel()
+            # Only remove the socket this daemon bound, never one that replaced it
+            with contextlib.suppress(FileNotFoundError):
+                current = os.stat(self.socket_path)
+                if (current.st_dev, current.st_ino) == (bound.st_dev, bound.st_ino):
+                    os.unlink(self.socket_path)
+            await self.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(ChatDaemon().serve())
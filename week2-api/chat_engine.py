@@ -0,0 +1,147 @@
+"""Async multi-session chat engine.
+
+One `ChatEngine` owns a single `AsyncAnthropic` client (and therefore a single
+shared HTTP connection pool) and any number of independent `ChatSession`
+conversations. Sessions can stream concurrently; a semaphore bounds how many
+requests are in flight at once, and a per-session lock keeps the turns of one
+conversation in order.
+
+Each session keeps its history in a `TokenBudgetWindow`, so an engine with
+`max_history_tokens` holds a bounded amount of memory per session; with a
+`ConversationStore` every message is also persisted and a session resumes
+from the stored tail on first use.
+"""
+
+import asyncio
+import math
+
+import anthropic
+import httpx
+from dotenv import load_dotenv
+
+from context_window import TokenBudgetWindow
+from prompt_cache import cached_request
+from telemetry import instrument
+
+# Load the API key from a .env file
+load_dotenv()
+
+MODEL = "claude-sonnet-4-20250514"
+MAX_TOKENS = 1000
+
+
+class ChatSession:
+    """One conversation with its own message history."""
+
+    def __init__(self, engine, session_id, system=None):
+        self.engine = engine
+        self.session_id = session_id
+        self.window = TokenBudgetWindow(engine.max_history_tokens, system=system)
+        if engine.store is not None:
+            self.window.attach(engine.store, session_id)
+        self.last_message = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def system(self):
+        return self.window.system
+
+    @property
+    def messages(self):
+        return self.window.messages
+
+    def _request(self):
+        """Build the keyword arguments for the next API call."""
+        # Cache breakpoints follow the conversation so each turn reads the previous prefix
+        return cached_request(
+            self.messages,
+            system=self.system,
+            model=self.engine.model,
+            max_tokens=self.engine.max_tokens,
+        )
+
+    async def stream(self, user_input):
+        """Send a user turn and yield the reply text as it streams in."""
+        async with self._lock, self.engine._in_flight:
+            self.window.add({"role": "user", "content": user_input})
+            try:
+                async with self.engine.client.messages.stream(**self._request()) as stream_response:
+                    async for chunk in stream_response.text_stream:
+                        yield chunk
+                final_message = await stream_response.get_final_message()
+            except BaseException:
+                # Drop the unanswered user turn so the history stays alternating
+                self.window.pop()
+                raise
+
+            self.last_message = final_message
+            self.window.record_usage(final_message.usage)
+            self.window.add(
+                {"role": "assistant", "content": final_message.content[0].text},
+                tokens=final_message.usage.output_tokens,
+            )
+
+    async def send(self, user_input):
+        """Send a user turn and return the full reply text and token usage."""
+        reply = "".join([chunk async for chunk in self.stream(user_input)])
+        return reply, self.last_message.usage
+
+
+class ChatEngine:
+    """Holds many chat sessions on one shared async client."""
+
+    def __init__(self, client=None, model=MODEL, max_tokens=MAX_TOKENS, max_in_flight=8,
+                 store=None, max_history_tokens=None):
+        if client is None:
+            client = instrument(anthropic.AsyncAnthropic(
+                http_client=anthropic.DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+                )
+            ), strategy="chat_engine")
+        self.client = client
+        self.model = model
+        self.max_tokens = max_tokens
+        self.store = store
+        self.max_history_tokens = max_history_tokens if max_history_tokens is not None else math.inf
+        self.sessions = {}
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+
+    def session(self, session_id, system=None):
+        """Return the session with this id, creating it on first use."""
+        if session_id not in self.sessions:
+            self.sessions[session_id] = ChatSession(self, session_id, system=system)
+        return self.sessions[session_id]
+
+    def close_session(self, session_id):
+        """Drop a session from memory; its stored history, if any, is kept."""
+        self.sessions.pop(session_id, None)
+
+    async def close(self):
+        await self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+# Demo: three independent conversations streamed concurrently from one process
+async def main():
+    async with ChatEngine() as engine:
+        async def run(session_id, turns):
+            session = engine.session(session_id)
+            for turn in turns:
+                reply, usage = await session.send(turn)
+                print(f"\n[{session_id}] You: {turn}\n[{session_id}] Claude: {reply}")
+                print(f"[{session_id}] Input tokens: {usage.input_tokens} Output tokens: {usage.output_tokens}")
+
+        await asyncio.gather(
+            run("alice", ["My favorite color is blue", "What's my favorite color?"]),
+            run("bob", ["My favorite color is green", "What's my favorite color?"]),
+            run("carol", ["I live in Chennai", "Where do I live?"]),
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
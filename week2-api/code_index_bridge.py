@@ -0,0 +1,145 @@
+"""In-process bridge between a chat loop and the code_index MCP server.
+
+Instead of launching `code_index.py` as a stdio subprocess and paying JSON-RPC
+serialization on every call (including multi-MB `read_file` results), the
+bridge imports the server module and calls its registered MCP request handlers
+directly:
+
+- `tools` turns the server's `list_tools` schemas into Anthropic tool
+  definitions,
+- `dispatch` runs every `tool_use` block of a response concurrently through
+  the server's `call_tool` handler and returns the matching `tool_result`
+  blocks. The code_index handlers do blocking file I/O, so each call runs on a
+  worker thread and a large `read_file` or search never stalls the chat loop.
+
+Going through the registered handlers rather than the bare functions keeps
+the results identical to the stdio path: arguments are validated against the
+input schema, and exceptions become `isError` results in the same way.
+
+Run it as a small code-search chat:
+    uv run week2-api/code_index_bridge.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import anthropic
+import mcp.types as types
+from dotenv import load_dotenv
+
+from prompt_cache import cached_request
+from telemetry import instrument
+
+# The code_index server lives with the week 1 MCP examples
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "week1-basics" / "code-index-mcp"))
+import code_index
+
+# Load the API key from a .env file
+load_dotenv()
+
+MODEL = "claude-sonnet-4-20250514"
+MAX_TOKENS = 2000
+MAX_AGENT_STEPS = 10
+
+
+def to_anthropic_tool(tool):
+    """Convert an MCP Tool into an Anthropic tool definition."""
+    return {
+        "name": tool.name,
+        "description": tool.description or "",
+        "input_schema": tool.inputSchema,
+    }
+
+
+def to_content_block(content):
+    """Convert an MCP content item into an Anthropic tool_result content block."""
+    if isinstance(content, types.TextContent):
+        return {"type": "text", "text": content.text}
+    if isinstance(content, types.ImageContent):
+        return {"type": "image", "source": {"type": "base64", "media_type": content.mimeType, "data": content.data}}
+    return {"type": "text", "text": content.model_dump_json()}
+
+
+class CodeIndexBridge:
+    """Calls an MCP server's tool handlers in-process."""
+
+    def __init__(self, server=code_index.server):
+        self.server = server
+        self._tools = None
+
+    async def tools(self):
+        """The server's tools as Anthropic tool definitions (listed once, then cached)."""
+        if self._tools is None:
+            result = await self.server.request_handlers[types.ListToolsRequest](None)
+            self._tools = [to_anthropic_tool(tool) for tool in result.root.tools]
+        return self._tools
+
+    async def call_tool(self, name, arguments):
+        """Run one tool through the server's call_tool handler and return the CallToolResult."""
+        request = types.CallToolRequest(
+            method="tools/call",
+            params=types.CallToolRequestParams(name=name, arguments=arguments),
+        )
+        handler = self.server.request_handlers[types.CallToolRequest]
+        # The handler is async but blocks on os.walk/open, so give it its own thread and loop
+        result = await asyncio.to_thread(asyncio.run, handler(request))
+        return result.root
+
+    async def _tool_result(self, tool_use_block):
+        result = await self.call_tool(tool_use_block.name, tool_use_block.input)
+        return {
+            "type": "tool_result",
+            "tool_use_id": tool_use_block.id,
+            "content": [to_content_block(content) for content in result.content],
+            "is_error": result.isError,
+        }
+
+    async def dispatch(self, content_blocks):
+        """Run every tool_use block concurrently and return their tool_result blocks in order."""
+        tool_use_blocks = [block for block in content_blocks if block.type == "tool_use"]
+        return list(await asyncio.gather(*(self._tool_result(block) for block in tool_use_blocks)))
+
+
+async def agent_turn(client, bridge, messages):
+    """Answer the latest user message, calling code_index tools until Claude is done."""
+    tools = await bridge.tools()
+    for _ in range(MAX_AGENT_STEPS):
+        response = await client.messages.create(**cached_request(
+            messages,
+            tools=tools,
+            model=MODEL,
+            max_tokens=MAX_TOKENS,
+        ))
+        messages.append({"role": "assistant", "content": response.content})
+        if response.stop_reason != "tool_use":
+            return response
+
+        for block in response.content:
+            if block.type == "tool_use":
+                print(f"[tool] {block.name} {block.input}")
+        messages.append({"role": "user", "content": await bridge.dispatch(response.content)})
+
+    return response
+
+
+async def main():
+    client = instrument(anthropic.AsyncAnthropic(), strategy="code_index_bridge")
+    bridge = CodeIndexBridge()
+    messages = []
+
+    print("Ask about your code (type 'quit' to exit)\n")
+    while True:
+        user_input = await asyncio.to_thread(input, "\nYou: ")
+        if user_input.lower() in ["exit", "quit"]:
+            print("Exiting the chat. Goodbye!")
+            break
+
+        messages.append({"role": "user", "content": user_input})
+        response = await agent_turn(client, bridge, messages)
+        print("".join(block.text for block in response.content if block.type == "text"))
+        print(f"\nInput tokens: {response.usage.input_tokens}\nOutput tokens: {response.usage.output_tokens}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
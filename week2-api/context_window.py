@@ -0,0 +1,135 @@
+"""Token-budget context window.
+
+Keeps a conversation's messages inside a token budget instead of a fixed
+message count. Each message's token count is stored when it is added, using
+the API's `usage` numbers where they exist and a local estimate otherwise, so
+the running total is always known without re-counting the history. When the
+total goes over budget the oldest turns are evicted from the left of a deque,
+which is O(1) amortized per turn. The system prompt is pinned and never evicted.
+
+Eviction trims the window down to a low-water mark below the budget rather
+than just under it. The first message then stays the same for several turns,
+so the cached prompt prefix keeps being read instead of being rewritten on
+every turn once the window is full.
+
+A window can be attached to a `ConversationStore`: it then resumes from the
+stored tail that fits its budget and persists every message it is given.
+"""
+
+from collections import deque
+
+# Rough characters-per-token ratio for English text, plus per-message overhead
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+# Once over budget, evict down to this fraction of it
+LOW_WATER_RATIO = 0.75
+
+
+def estimate_tokens(content):
+    """Estimate the token count of a string or a list of content blocks."""
+    if content is None:
+        return 0
+    if isinstance(content, str):
+        return len(content) // CHARS_PER_TOKEN + 1
+    total = 0
+    for block in content:
+        if not isinstance(block, dict):
+            block = block.model_dump(exclude_none=True)
+        text = block.get("text") or block.get("content") or block.get("input") or ""
+        total += estimate_tokens(text if isinstance(text, str) else str(text))
+    return total
+
+
+def request_input_tokens(usage):
+    """Total prompt size of a request, including tokens served from or written to the cache."""
+    return (
+        usage.input_tokens
+        + (getattr(usage, "cache_read_input_tokens", None) or 0)
+        + (getattr(usage, "cache_creation_input_tokens", None) or 0)
+    )
+
+
+class TokenBudgetWindow:
+    """Conversation history trimmed to a token budget with a pinned system prompt."""
+
+    def __init__(self, max_tokens, system=None, low_water_ratio=LOW_WATER_RATIO):
+        self.max_tokens = max_tokens
+        self.low_water_tokens = max_tokens * low_water_ratio
+        self.system = system
+        self.system_tokens = estimate_tokens(system)
+        self.total_tokens = self.system_tokens
+        # Each entry is [message, tokens, seq]; lists so the count can be corrected in place
+        self._entries = deque()
+        self.store = None
+        self.session_id = None
+
+    def attach(self, store, session_id):
+        """Resume from the stored tail of a session and persist new messages to it.
+
+        Returns the sequence number of the oldest resumed message (None if nothing was
+        resumed); `store.iter_before` with it yields the history outside the window.
+        """
+        for message, tokens, seq in store.load_tail(session_id, max_tokens=self.max_tokens - self.system_tokens):
+            self._entries.append([message, tokens, seq])
+            self.total_tokens += tokens
+        self.store = store
+        self.session_id = session_id
+        return self._entries[0][2] if self._entries else None
+
+    @property
+    def messages(self):
+        """The messages currently inside the window, oldest first."""
+        return [entry[0] for entry in self._entries]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, message, tokens=None):
+        """Append a message and evict old turns until the window fits; return the evicted messages."""
+        if tokens is None:
+            tokens = estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+        seq = self.store.append(self.session_id, message, tokens) if self.store else None
+        self._entries.append([message, tokens, seq])
+        self.total_tokens += tokens
+        return self._evict()
+
+    def pop(self):
+        """Remove and return the newest message, e.g. when its request failed."""
+        message, tokens, seq = self._entries.pop()
+        self.total_tokens -= tokens
+        if self.store and seq is not None:
+            self.store.delete_message(self.session_id, seq)
+        return message
+
+    def record_usage(self, usage, extra_tokens=0):
+        """Replace the estimate for the newest message with the size the API actually counted.
+
+        Call this after a request built from `messages` and before adding the reply.
+        `extra_tokens` is the estimated size of anything the request carried on top of
+        the window, such as per-turn additions to the system prompt.
+        """
+        if not self._entries:
+            return
+        actual = request_input_tokens(usage) - extra_tokens
+        newest = self._entries[-1]
+        correction = max(newest[1] + actual - self.total_tokens, 1) - newest[1]
+        newest[1] += correction
+        self.total_tokens += correction
+        if self.store and newest[2] is not None:
+            self.store.update_tokens(self.session_id, newest[2], newest[1])
+
+    def _evict(self):
+        evicted = []
+        if self.total_tokens > self.max_tokens:
+            # Always keep the newest message, even if it alone is over budget
+            while self.total_tokens > self.low_water_tokens and len(self._entries) > 1:
+                evicted.append(self._pop_oldest())
+        # The history must start with a user turn, so a reply left on its own goes too
+        while self._entries and self._entries[0][0]["role"] != "user":
+            evicted.append(self._pop_oldest())
+        return evicted
+
+    def _pop_oldest(self):
+        message, tokens, _ = self._entries.popleft()
+        self.total_tokens -= tokens
+        return message
@@ -0,0 +1,128 @@
+"""Disk-backed conversation store.
+
+Messages are appended to a SQLite table keyed by (session_id, seq), so adding
+a message is a single indexed insert and history survives restarts. Each row
+keeps the message's token count, which lets `load_tail` walk the newest rows
+backwards and stop as soon as the active context strategy's budget is full:
+resuming a session reads only the window it needs, never the whole history.
+
+The database lives next to this module unless `CONVERSATION_DB` says
+otherwise, so every script and the chat daemon share one history wherever
+they are started from. Several processes may append to the same session:
+sequence numbers are assigned inside the INSERT, not cached per process.
+"""
+
+import json
+import os
+import sqlite3
+
+DEFAULT_PATH = os.getenv(
+    "CONVERSATION_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "conversations.db"),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID
+"""
+
+
+class ConversationStore:
+    """Append-only message log per session, stored in SQLite."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(SCHEMA)
+        self._db.commit()
+
+    def append(self, session_id, message, tokens):
+        """Persist one message and return its sequence number."""
+        # MAX(seq) is a lookup at the end of the session's primary-key range, and doing
+        # it inside the INSERT keeps appends from other processes from colliding
+        seq = self._db.execute(
+            "INSERT INTO messages (session_id, seq, role, content, tokens) "
+            "SELECT ?, COALESCE(MAX(seq) + 1, 0), ?, ?, ? FROM messages WHERE session_id = ? "
+            "RETURNING seq",
+            (session_id, message["role"], json.dumps(message["content"]), tokens, session_id),
+        ).fetchone()[0]
+        self._db.commit()
+        return seq
+
+    def update_tokens(self, session_id, seq, tokens):
+        """Replace a message's stored token count, e.g. with the API's exact number."""
+        self._db.execute(
+            "UPDATE messages SET tokens = ? WHERE session_id = ? AND seq = ?",
+            (tokens, session_id, seq),
+        )
+        self._db.commit()
+
+    def delete_message(self, session_id, seq):
+        """Remove one message; only the newest can be removed without leaving a gap."""
+        self._db.execute("DELETE FROM messages WHERE session_id = ? AND seq = ?", (session_id, seq))
+        self._db.commit()
+
+    def load_tail(self, session_id, max_tokens=None, max_messages=None):
+        """Return the newest (message, tokens, seq) triples that fit the limits, oldest first.
+
+        The window always starts on a user turn, matching what the API accepts.
+        """
+        rows = self._db.execute(
+            "SELECT role, content, tokens, seq FROM messages WHERE session_id = ? ORDER BY seq DESC",
+            (session_id,),
+        )
+        tail = []
+        total = 0
+        for role, content, tokens, seq in rows:
+            if max_messages is not None and len(tail) >= max_messages:
+                break
+            if max_tokens is not None and total + tokens > max_tokens:
+                break
+            tail.append(({"role": role, "content": json.loads(content)}, tokens, seq))
+            total += tokens
+        rows.close()
+
+        tail.reverse()
+        while tail and tail[0][0]["role"] != "user":
+            tail.pop(0)
+        return tail
+
+    def iter_before(self, session_id, seq=None):
+        """Yield the messages stored before `seq` (all of them if None), oldest first."""
+        if seq is None:
+            rows = self._db.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+            )
+        else:
+            rows = self._db.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? AND seq < ? ORDER BY seq",
+                (session_id, seq),
+            )
+        for role, content in rows:
+            yield {"role": role, "content": json.loads(content)}
+
+    def count(self, session_id):
+        """Number of messages stored for a session."""
+        return self._db.execute(
+            "SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)
+        ).fetchone()[0]
+
+    def sessions(self):
+        """Ids of all stored sessions."""
+        return [row[0] for row in self._db.execute("SELECT DISTINCT session_id FROM messages")]
+
+    def delete_session(self, session_id):
+        """Remove every message of a session."""
+        self._db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
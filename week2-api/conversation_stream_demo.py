@@ -1,11 +1,14 @@
 import anthropic
 from dotenv import load_dotenv
 
+from response_cache import maybe_cached
+from telemetry import instrument
+
 # Load the API key from a .env file
 load_dotenv()
 
 # Create a client instance
-client = anthropic.Anthropic()
+client = maybe_cached(instrument(anthropic.Anthropic(), strategy="conversation_stream_demo"))
 
 # Conversation history memory
 conversation = []
@@ -0,0 +1,130 @@
+"""Local fact store with BM25 retrieval.
+
+Facts are sentence-sized pieces of conversation text. They are extracted
+locally (no model call) and indexed incrementally into an inverted index whose
+postings live in growable NumPy arrays. A query scores every fact with BM25 in
+a few vectorized operations per query term, so retrieving the top-k relevant
+facts takes well under a millisecond for thousands of facts and needs no
+network access.
+"""
+
+import math
+import re
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by do does did for from had has have i if in into is it its "
+    "me my of on or our so that the their them then there these they this to was we were "
+    "what when where which who will with you your".split()
+)
+
+# Facts shorter than this many (non-stopword) tokens are not worth storing
+MIN_FACT_TOKENS = 2
+
+
+def tokenize(text):
+    """Lower-case word tokens with stopwords removed."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def extract_facts(message):
+    """Split a message's text into sentence-sized candidate facts."""
+    content = message["content"]
+    if not isinstance(content, str):
+        content = " ".join(block.get("text", "") for block in content if isinstance(block, dict))
+    facts = []
+    for sentence in SENTENCE_PATTERN.split(content):
+        sentence = sentence.strip(" -*#\t")
+        if len(tokenize(sentence)) >= MIN_FACT_TOKENS:
+            facts.append(sentence)
+    return facts
+
+
+class _Postings:
+    """Growable (doc id, term frequency) arrays for one term."""
+
+    __slots__ = ("docs", "freqs", "size")
+
+    def __init__(self, capacity=4):
+        self.docs = np.empty(capacity, dtype=np.int32)
+        self.freqs = np.empty(capacity, dtype=np.float32)
+        self.size = 0
+
+    def append(self, doc, freq):
+        if self.size == len(self.docs):
+            self.docs = np.resize(self.docs, 2 * self.size)
+            self.freqs = np.resize(self.freqs, 2 * self.size)
+        self.docs[self.size] = doc
+        self.freqs[self.size] = freq
+        self.size += 1
+
+
+class FactStore:
+    """Incrementally indexed facts with BM25 top-k retrieval."""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.facts = []
+        self._seen = set()
+        self._postings = {}
+        self._doc_lengths = np.empty(64, dtype=np.float32)
+        self._total_length = 0.0
+
+    def __len__(self):
+        return len(self.facts)
+
+    def add(self, fact):
+        """Index one fact; exact duplicates are ignored. Return whether it was added."""
+        key = " ".join(tokenize(fact))
+        if not key or key in self._seen:
+            return False
+        self._seen.add(key)
+
+        doc = len(self.facts)
+        self.facts.append(fact)
+        tokens = key.split()
+        if doc == len(self._doc_lengths):
+            self._doc_lengths = np.resize(self._doc_lengths, 2 * doc)
+        self._doc_lengths[doc] = len(tokens)
+        self._total_length += len(tokens)
+
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = _Postings()
+            postings.append(doc, count)
+        return True
+
+    def add_message(self, message):
+        """Extract facts from a message and index them; return how many were new."""
+        return sum(self.add(fact) for fact in extract_facts(message))
+
+    def search(self, query, k=5):
+        """Return up to k (fact, score) pairs ranked by BM25 relevance to the query."""
+        n = len(self.facts)
+        terms = [term for term in set(tokenize(query)) if term in self._postings]
+        if not n or not terms:
+            return []
+
+        doc_lengths = self._doc_lengths[:n]
+        length_norm = self.k1 * (1 - self.b + self.b * doc_lengths / (self._total_length / n))
+        scores = np.zeros(n, dtype=np.float32)
+        for term in terms:
+            postings = self._postings[term]
+            docs = postings.docs[:postings.size]
+            freqs = postings.freqs[:postings.size]
+            idf = math.log(1 + (n - postings.size + 0.5) / (postings.size + 0.5))
+            # Each doc appears once per term, so fancy-index += is safe here
+            scores[docs] += idf * freqs * (self.k1 + 1) / (freqs + length_norm[docs])
+
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.facts[doc], float(scores[doc])) for doc in top if scores[doc] > 0]
@@ -1,11 +1,14 @@
 from anthropic import Anthropic
 
+from response_cache import maybe_cached
+from telemetry import instrument
+
 # Load the API key from an OS environment variable
 import os
 api_key = os.getenv("ANTHROPIC_API_KEY")
 
 # Create a client instance
-client = Anthropic(api_key=api_key)
+client = maybe_cached(instrument(Anthropic(api_key=api_key), strategy="first_call"))
 
 # Make a first API call to generate a response
 response = client.messages.create(
@@ -1,11 +1,14 @@
 from anthropic import Anthropic
 
+from response_cache import maybe_cached
+from telemetry import instrument
+
 # Load the API key from a .env file
 from dotenv import load_dotenv
 load_dotenv()
 
 # Create a client instance
-client = Anthropic()
+client = maybe_cached(instrument(Anthropic(), strategy="first_call_stream"))
 
 # Make a first API call to generate a response
 with client.messages.stream(
@@ -0,0 +1,85 @@
+"""Automatic prompt-caching breakpoints for chat requests.
+
+The API caches the request prefix up to each `cache_control` breakpoint, so a
+growing conversation only needs to pay full price for the newest turn.
+`with_cache_breakpoints` marks the stable prefix of a request without touching
+the caller's history:
+
+- the last tool definition (caches all tools),
+- the last system block (caches tools + system prompt),
+- the last message (writes the whole conversation so far to the cache),
+- the user message before it (where the previous turn's breakpoint was, so
+  that turn's cache entry is read even when the history grows past the
+  API's 20-block lookback).
+
+Because the last-message breakpoint moves forward every turn, each request
+reads what the previous one wrote. Prefixes shorter than the model's minimum
+cacheable length are simply not cached, so it is safe to apply everywhere.
+
+Text that changes every turn, such as retrieved facts, must not sit inside the
+cached prefix. Pass it as `turn_context` and it is appended to the last message
+after its breakpoint, so the prefix stays byte-identical from turn to turn.
+"""
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def _as_block(block):
+    """Return a dict copy of a content block (dicts or SDK objects)."""
+    if isinstance(block, dict):
+        return dict(block)
+    return block.model_dump(exclude_none=True)
+
+
+def _mark_content(content):
+    """Return a copy of message content with a breakpoint on its last block."""
+    if isinstance(content, str):
+        return [{"type": "text", "text": content, "cache_control": CACHE_CONTROL}]
+    blocks = [_as_block(block) for block in content]
+    if blocks:
+        blocks[-1]["cache_control"] = CACHE_CONTROL
+    return blocks
+
+
+def with_cache_breakpoints(messages, system=None, tools=None, turn_context=None):
+    """Return copies of messages, system and tools with cache breakpoints placed."""
+    marked_tools = None
+    if tools:
+        marked_tools = [dict(tool) for tool in tools]
+        marked_tools[-1]["cache_control"] = CACHE_CONTROL
+
+    marked_system = None
+    if system:
+        marked_system = _mark_content(system)
+
+    marked_messages = list(messages)
+    if marked_messages:
+        last = len(marked_messages) - 1
+        marked_messages[last] = {**marked_messages[last], "content": _mark_content(marked_messages[last]["content"])}
+        # The previous turn's breakpoint sat on the last user message before this one
+        for index in range(last - 1, -1, -1):
+            if marked_messages[index]["role"] == "user":
+                marked_messages[index] = {**marked_messages[index], "content": _mark_content(marked_messages[index]["content"])}
+                break
+        if turn_context:
+            marked_messages[last]["content"].append({"type": "text", "text": turn_context})
+
+    return marked_messages, marked_system, marked_tools
+
+
+def cached_request(messages, system=None, tools=None, turn_context=None, **kwargs):
+    """Build `messages.create`/`messages.stream` keyword arguments with cache breakpoints."""
+    marked_messages, marked_system, marked_tools = with_cache_breakpoints(messages, system, tools, turn_context)
+    request = {**kwargs, "messages": marked_messages}
+    if marked_system is not None:
+        request["system"] = marked_system
+    if marked_tools is not None:
+        request["tools"] = marked_tools
+    return request
+
+
+def format_cache_usage(usage):
+    """Describe the cache read/write token counts reported in `usage`."""
+    cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+    cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+    return f"Cache read tokens: {cache_read}\nCache write tokens: {cache_write}"
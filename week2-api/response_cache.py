@@ -0,0 +1,200 @@
+"""Content-addressed response cache for deterministic API calls.
+
+`CachedClient` wraps a sync Anthropic client. Each `messages.create` or
+`messages.stream` request is keyed by a SHA-256 of its canonical JSON (model,
+messages, tools, max_tokens and every other argument), and the response is
+stored on disk under that key. Repeating the request returns the stored
+message without a network call or token cost; streamed requests are replayed
+as a stream of the cached text, so streaming code runs unchanged.
+
+The cache is opt-in: `maybe_cached(client)` only wraps the client when the
+`RESPONSE_CACHE_DIR` environment variable is set. Entries are evicted least
+recently used first once the directory grows past `RESPONSE_CACHE_MAX_BYTES`.
+
+Put the cache outside the telemetry layer, `maybe_cached(instrument(client))`,
+so that only requests that reach the API are timed and cache hits do not skew
+the latency numbers.
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+
+from anthropic.types import Message
+
+RESPONSE_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR")
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 100 * 1024 * 1024))
+
+# Replayed streams emit the cached text in word-sized chunks
+REPLAY_CHUNK_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+def _jsonable(value):
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    raise TypeError(f"Cannot hash request value of type {type(value).__name__}")
+
+
+def request_key(request):
+    """Canonical hash of a request's keyword arguments."""
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), default=_jsonable)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResponseCache:
+    """Directory of cached messages with LRU eviction by total size."""
+
+    def __init__(self, directory, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # key -> size, least recently used first; file mtimes carry the order across runs
+        self._index = OrderedDict()
+        self._total_bytes = 0
+        entries = sorted(self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        for path in entries:
+            size = path.stat().st_size
+            self._index[path.stem] = size
+            self._total_bytes += size
+
+    def _path(self, key):
+        return self.directory / f"{key}.json"
+
+    def get(self, key):
+        """Return the cached message for a key, or None."""
+        if key not in self._index:
+            self.misses += 1
+            return None
+        try:
+            data = json.loads(self._path(key).read_text())
+        except (OSError, json.JSONDecodeError):
+            self._forget(key)
+            self.misses += 1
+            return None
+        self._index.move_to_end(key)
+        os.utime(self._path(key))
+        self.hits += 1
+        return Message.model_validate(data)
+
+    def put(self, key, message):
+        """Store a message and evict the least recently used entries if over budget."""
+        payload = json.dumps(message.model_dump(mode="json"))
+        path = self._path(key)
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_text(payload)
+        os.replace(temp_path, path)
+
+        self._forget(key, unlink=False)
+        self._index[key] = len(payload)
+        self._total_bytes += len(payload)
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            self._forget(next(iter(self._index)))
+
+    def _forget(self, key, unlink=True):
+        size = self._index.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+        if unlink:
+            self._path(key).unlink(missing_ok=True)
+
+
+class _ReplayStream:
+    """Plays a cached message back through the MessageStream interface."""
+
+    def __init__(self, message):
+        self._message = message
+
+    @property
+    def text_stream(self):
+        for block in self._message.content:
+            if block.type == "text":
+                yield from REPLAY_CHUNK_PATTERN.findall(block.text)
+
+    def get_final_message(self):
+        return self._message
+
+    def get_final_text(self):
+        return "".join(block.text for block in self._message.content if block.type == "text")
+
+    def until_done(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _ReplayStreamManager:
+    def __init__(self, message):
+        self._stream = _ReplayStream(message)
+
+    def __enter__(self):
+        return self._stream
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class _RecordingStreamManager:
+    """Passes a live stream through and caches its final message on success."""
+
+    def __init__(self, manager, cache, key):
+        self._manager = manager
+        self._cache = cache
+        self._key = key
+
+    def __enter__(self):
+        self._stream = self._manager.__enter__()
+        return self._stream
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is None:
+            self._cache.put(self._key, self._stream.get_final_message())
+        return self._manager.__exit__(exc_type, exc, tb)
+
+
+class _CachedMessages:
+    def __init__(self, messages, cache):
+        self._messages = messages
+        self._cache = cache
+
+    def create(self, **kwargs):
+        key = request_key(kwargs)
+        message = self._cache.get(key)
+        if message is None:
+            message = self._messages.create(**kwargs)
+            self._cache.put(key, message)
+        return message
+
+    def stream(self, **kwargs):
+        key = request_key(kwargs)
+        message = self._cache.get(key)
+        if message is not None:
+            return _ReplayStreamManager(message)
+        return _RecordingStreamManager(self._messages.stream(**kwargs), self._cache, key)
+
+    def __getattr__(self, name):
+        return getattr(self._messages, name)
+
+
+class CachedClient:
+    """Sync Anthropic client proxy that serves repeated requests from a ResponseCache."""
+
+    def __init__(self, client, cache):
+        self._client = client
+        self.cache = cache
+        self.messages = _CachedMessages(client.messages, cache)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def maybe_cached(client, directory=RESPONSE_CACHE_DIR):
+    """Wrap the client in a response cache when a cache directory is configured."""
+    if not directory:
+        return client
+    return CachedClient(client, ResponseCache(directory))
@@ -0,0 +1,105 @@
+"""Incremental background summarization of evicted conversation turns.
+
+Instead of re-summarizing the whole conversation before every reply,
+`RollingSummarizer` folds only the messages that just left the context
+window into the running summary. Folding runs on a single background worker,
+after the reply has been streamed, so the user never waits on it; the worker
+keeps folds in order so no evicted turn is lost or summarized twice. If a fold
+request fails transiently (rate limit, overload, server or network error), its
+messages are kept and folded in with the next batch, up to `MAX_FOLD_ATTEMPTS`
+times; a batch the API rejects outright is logged and dropped.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import anthropic
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_MODEL = "claude-sonnet-4-20250514"
+SUMMARY_MAX_TOKENS = 500
+# Give up on a batch of evicted messages after this many failed folds
+MAX_FOLD_ATTEMPTS = 3
+
+
+def is_transient(error):
+    """Whether retrying the same request later may succeed."""
+    if isinstance(error, anthropic.APIConnectionError):
+        return True
+    status = getattr(error, "status_code", None)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def format_messages(messages):
+    """Render messages as a plain transcript for the summarization prompt."""
+    lines = []
+    for message in messages:
+        content = message["content"]
+        if not isinstance(content, str):
+            content = " ".join(block.get("text", "") for block in content if isinstance(block, dict))
+        lines.append(f"{message['role'].capitalize()}: {content}")
+    return "\n".join(lines)
+
+
+class RollingSummarizer:
+    """Keeps a running summary of evicted messages, updated in the background."""
+
+    def __init__(self, client, model=SUMMARY_MODEL, max_tokens=SUMMARY_MAX_TOKENS):
+        self.client = client
+        self.model = model
+        self.max_tokens = max_tokens
+        self._summary = ""
+        self._lock = threading.Lock()
+        # Evicted messages whose fold failed, and how often; only touched by the worker thread
+        self._pending = []
+        self._pending_attempts = 0
+        # One worker so folds are applied in the order the messages were evicted
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rolling-summary")
+
+    @property
+    def summary(self):
+        """The latest finished summary; never blocks on a pending fold."""
+        with self._lock:
+            return self._summary
+
+    def fold(self, evicted_messages):
+        """Schedule evicted messages to be folded into the summary and return the future."""
+        if not evicted_messages:
+            return None
+        return self._executor.submit(self._fold, list(evicted_messages))
+
+    def _fold(self, evicted_messages):
+        batch = self._pending + evicted_messages
+        previous = self.summary
+        prompt = (
+            f"Current summary of the conversation so far:\n{previous or '(none yet)'}\n\n"
+            f"New messages that are leaving the context window:\n{format_messages(batch)}\n\n"
+            "Update the summary to include the new messages. Keep it to 3-4 sentences "
+            "and keep any facts the user has shared. Reply with the summary only."
+        )
+        try:
+            response = self.client.messages.create(
+                model=self.model,
+                max_tokens=self.max_tokens,
+                messages=[{"role": "user", "content": prompt}],
+            )
+        except anthropic.APIError as e:
+            attempts = self._pending_attempts + 1
+            if is_transient(e) and attempts < MAX_FOLD_ATTEMPTS:
+                # The messages have already left the window; keep them for the next fold
+                self._pending, self._pending_attempts = batch, attempts
+                logger.warning("Summary fold of %d message(s) failed, will retry with the next batch: %s", len(batch), e)
+            else:
+                self._pending, self._pending_attempts = [], 0
+                logger.warning("Summary fold of %d message(s) failed, dropping them from the summary: %s", len(batch), e)
+            return None
+        self._pending, self._pending_attempts = [], 0
+        with self._lock:
+            self._summary = response.content[0].text
+        return self._summary
+
+    def close(self, wait=True):
+        """Stop the background worker, optionally waiting for pending folds."""
+        self._executor.shutdown(wait=wait)
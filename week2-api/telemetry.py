@@ -0,0 +1,364 @@
+"""Latency and throughput telemetry for Anthropic API calls.
+
+`instrument(client, strategy=...)` wraps a sync or async Anthropic client so
+every `messages.create` and `messages.stream` call is timed. For each request
+it records time-to-first-token, inter-token latency (between streamed text
+chunks), output tokens per second and total request time, alongside the token
+usage. Requests are aggregated into fixed-bucket histograms per
+(model, strategy), which keeps memory flat however many requests are made.
+
+Set `TELEMETRY_FILE` to export one JSON line per request, plus one summary
+line per (model, strategy) when the process exits. The wrapped client is a
+drop-in replacement: attributes other than `messages` pass straight through.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+import anthropic
+
+TELEMETRY_FILE = os.getenv("TELEMETRY_FILE")
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is open-ended)
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+# Histogram bucket upper bounds in output tokens per second
+THROUGHPUT_BUCKETS = (1, 5, 10, 20, 30, 40, 50, 75, 100, 150, 200, 300, 500)
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, min and max."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the given percentile (max for the open bucket)."""
+        if not self.count:
+            return None
+        rank = pct / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 2) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "bounds": list(self.bounds),
+            "counts": self.counts,
+        }
+
+
+class _Aggregate:
+    """Histograms for one (model, strategy) pair."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.ttft_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.inter_token_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.total_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.tokens_per_sec = Histogram(THROUGHPUT_BUCKETS)
+
+
+class Telemetry:
+    """Collects per-request metrics, aggregates them and optionally exports JSON lines."""
+
+    def __init__(self, path=TELEMETRY_FILE):
+        self.path = path
+        self.aggregates = defaultdict(_Aggregate)
+        self._lock = threading.Lock()
+        if path:
+            atexit.register(self.export_summary)
+
+    def record(self, record, gaps_ms=()):
+        """Add one request record and the gaps between its streamed chunks."""
+        with self._lock:
+            aggregate = self.aggregates[(record["model"], record["strategy"])]
+            aggregate.requests += 1
+            if record["error"]:
+                aggregate.errors += 1
+            aggregate.input_tokens += record["input_tokens"] or 0
+            aggregate.output_tokens += record["output_tokens"] or 0
+            for name in ("ttft_ms", "total_ms", "tokens_per_sec"):
+                if record[name] is not None:
+                    getattr(aggregate, name).add(record[name])
+            for gap in gaps_ms:
+                aggregate.inter_token_ms.add(gap)
+
+            if self.path:
+                with open(self.path, "a") as f:
+                    f.write(json.dumps({"type": "request", **record}) + "\n")
+
+    def summary(self):
+        """Aggregated metrics per (model, strategy)."""
+        with self._lock:
+            return [
+                {
+                    "model": model,
+                    "strategy": strategy,
+                    "requests": aggregate.requests,
+                    "errors": aggregate.errors,
+                    "input_tokens": aggregate.input_tokens,
+                    "output_tokens": aggregate.output_tokens,
+                    "ttft_ms": aggregate.ttft_ms.to_dict(),
+                    "inter_token_ms": aggregate.inter_token_ms.to_dict(),
+                    "total_ms": aggregate.total_ms.to_dict(),
+                    "tokens_per_sec": aggregate.tokens_per_sec.to_dict(),
+                }
+                for (model, strategy), aggregate in self.aggregates.items()
+            ]
+
+    def export_summary(self):
+        """Append one summary line per (model, strategy) to the export file."""
+        if not self.path or not self.aggregates:
+            return
+        with open(self.path, "a") as f:
+            for entry in self.summary():
+                f.write(json.dumps({"type": "summary", **entry}) + "\n")
+
+
+# Shared by every instrumented client in the process
+telemetry = Telemetry()
+
+
+class _Timer:
+    """Timestamps for one request, turned into a record when it finishes."""
+
+    def __init__(self, telemetry, strategy, request, streamed):
+        self.telemetry = telemetry
+        self.strategy = strategy
+        self.model = request.get("model")
+        self.streamed = streamed
+        self.start = time.perf_counter()
+        self.first = None
+        self.last = None
+        self.chunks = 0
+        self.gaps_ms = []
+
+    def tick(self):
+        """Mark the arrival of a streamed text chunk."""
+        now = time.perf_counter()
+        if self.first is None:
+            self.first = now
+        else:
+            self.gaps_ms.append((now - self.last) * 1000)
+        self.last = now
+        self.chunks += 1
+
+    def finish(self, message=None, error=None):
+        end = time.perf_counter()
+        usage = getattr(message, "usage", None)
+        output_tokens = getattr(usage, "output_tokens", None)
+        # Without streaming the first token arrives with the whole response
+        first = self.first if self.first is not None else end
+        generation_s = (self.last or end) - first
+        if output_tokens and generation_s > 0:
+            tokens_per_sec = output_tokens / generation_s
+        elif output_tokens:
+            tokens_per_sec = output_tokens / (end - self.start)
+        else:
+            tokens_per_sec = None
+        self.telemetry.record({
+            "timestamp": time.time(),
+            "model": self.model,
+            "strategy": self.strategy,
+            "streamed": self.streamed,
+            "ttft_ms": round((first - self.start) * 1000, 2) if message is not None else None,
+            "total_ms": round((end - self.start) * 1000, 2),
+            "tokens_per_sec": round(tokens_per_sec, 2) if tokens_per_sec else None,
+            "chunks": self.chunks,
+            "mean_inter_token_ms": round(sum(self.gaps_ms) / len(self.gaps_ms), 2) if self.gaps_ms else None,
+            "input_tokens": getattr(usage, "input_tokens", None),
+            "output_tokens": output_tokens,
+            "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", None),
+            "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", None),
+            "stop_reason": getattr(message, "stop_reason", None),
+            "error": type(error).__name__ if error else None,
+        }, self.gaps_ms)
+
+
+class _Stream:
+    """Wraps a MessageStream, timestamping text chunks as they are read."""
+
+    def __init__(self, stream, timer):
+        self._stream = stream
+        self._timer = timer
+
+    @property
+    def text_stream(self):
+        for text in self._stream.text_stream:
+            self._timer.tick()
+            yield text
+
+    def __iter__(self):
+        for event in self._stream:
+            if event.type == "content_block_delta":
+                self._timer.tick()
+            yield event
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class _StreamManager:
+    def __init__(self, manager, timer):
+        self._manager = manager
+        self._timer = timer
+
+    def __enter__(self):
+        try:
+            self._stream = self._manager.__enter__()
+        except Exception as error:
+            # The request failed before streaming started, so __exit__ will not run
+            self._timer.finish(error=error)
+            raise
+        return _Stream(self._stream, self._timer)
+
+    def __exit__(self, exc_type, exc, tb):
+        message, error = None, exc
+        if exc is None:
+            try:
+                message = self._stream.get_final_message()
+            except Exception as final_error:
+                error = final_error
+        self._timer.finish(message, error)
+        return self._manager.__exit__(exc_type, exc, tb)
+
+
+class _AsyncStream:
+    """Async counterpart of `_Stream`."""
+
+    def __init__(self, stream, timer):
+        self._stream = stream
+        self._timer = timer
+
+    @property
+    def text_stream(self):
+        return self._text_stream()
+
+    async def _text_stream(self):
+        async for text in self._stream.text_stream:
+            self._timer.tick()
+            yield text
+
+    async def __aiter__(self):
+        async for event in self._stream:
+            if event.type == "content_block_delta":
+                self._timer.tick()
+            yield event
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class _AsyncStreamManager:
+    def __init__(self, manager, timer):
+        self._manager = manager
+        self._timer = timer
+
+    async def __aenter__(self):
+        try:
+            self._stream = await self._manager.__aenter__()
+        except Exception as error:
+            self._timer.finish(error=error)
+            raise
+        return _AsyncStream(self._stream, self._timer)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        message, error = None, exc
+        if exc is None:
+            try:
+                message = await self._stream.get_final_message()
+            except Exception as final_error:
+                error = final_error
+        self._timer.finish(message, error)
+        return await self._manager.__aexit__(exc_type, exc, tb)
+
+
+class _Messages:
+    def __init__(self, messages, strategy, telemetry):
+        self._messages = messages
+        self._strategy = strategy
+        self._telemetry = telemetry
+
+    def create(self, **kwargs):
+        timer = _Timer(self._telemetry, self._strategy, kwargs, streamed=False)
+        try:
+            message = self._messages.create(**kwargs)
+        except Exception as error:
+            timer.finish(error=error)
+            raise
+        timer.finish(message)
+        return message
+
+    def stream(self, **kwargs):
+        timer = _Timer(self._telemetry, self._strategy, kwargs, streamed=True)
+        return _StreamManager(self._messages.stream(**kwargs), timer)
+
+    def __getattr__(self, name):
+        return getattr(self._messages, name)
+
+
+class _AsyncMessages(_Messages):
+    async def create(self, **kwargs):
+        timer = _Timer(self._telemetry, self._strategy, kwargs, streamed=False)
+        try:
+            message = await self._messages.create(**kwargs)
+        except Exception as error:
+            timer.finish(error=error)
+            raise
+        timer.finish(message)
+        return message
+
+    def stream(self, **kwargs):
+        timer = _Timer(self._telemetry, self._strategy, kwargs, streamed=True)
+        return _AsyncStreamManager(self._messages.stream(**kwargs), timer)
+
+
+class InstrumentedClient:
+    """Anthropic client proxy whose `messages` calls are timed."""
+
+    def __init__(self, client, strategy="default", telemetry=telemetry):
+        self._client = client
+        self.strategy = strategy
+        self.telemetry = telemetry
+        messages_class = _AsyncMessages if isinstance(client, anthropic.AsyncAnthropic) else _Messages
+        self.messages = messages_class(client.messages, strategy, telemetry)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def instrument(client, strategy="default", telemetry=telemetry):
+    """Wrap a client (or re-label an instrumented one) so its requests are recorded."""
+    if isinstance(client, InstrumentedClient):
+        client = client._client
+    return InstrumentedClient(client, strategy=strategy, telemetry=telemetry)